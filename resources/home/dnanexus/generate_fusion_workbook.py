@@ -2,18 +2,29 @@
 # eggd_generate_fusion_workbook 1.0.0
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
+from importlib import metadata
 import subprocess
 from typing import List
 
+
+def is_installed(wheel: str) -> bool:
+    """Checks if the package of a wheel is installed at the wheel's version"""
+    name, version = os.path.basename(wheel).split("-")[:2]
+    try:
+        return metadata.version(name) == version
+    except metadata.PackageNotFoundError:
+        return False
+
+
 if os.path.exists("/home/dnanexus"):
-    # running in DNAnexus
-    subprocess.check_call(
-        ["pip", "install", "--no-index", "--no-deps"] + glob("packages/*")
-    )
+    # running in DNAnexus; skip wheels already installed on the worker
+    wheels = [wheel for wheel in glob("packages/*") if not is_installed(wheel)]
+    if wheels:
+        subprocess.check_call(["pip", "install", "--no-index", "--no-deps"] + wheels)
 
 import dxpy
-import openpyxl
 import pandas as pd
 from utils.defaults import (
     EPIC_SHEET_CONFIG,
@@ -27,7 +38,7 @@ from utils.defaults import (
     PREV_POS_SHEET_CONFIG,
     REF_SOURCES_SHEET_CONFIG,
 )
-from utils.excel import format_workbook, write_df_to_sheet, add_extra_columns
+from utils.excel import format_workbook, write_df_to_sheet
 from utils.parser import (
     parse_fastqc,
     parse_fusion_inspector,
@@ -43,6 +54,7 @@ from utils.utils import (
     get_project_info,
     read_dxfile,
     get_dxfile,
+    to_dxfile,
 )
 
 
@@ -82,22 +94,34 @@ def main(
         Dictionary containing DXLink to the generated fusion workbook
     """
     # Initialize inputs into dxpy.DXDataObject instances
-    starfusion_files = [dxpy.DXFile(item) for item in starfusion_files]
-    fusioninspector_files = [dxpy.DXFile(item) for item in fusioninspector_files]
-    arriba_files = [dxpy.DXFile(item) for item in arriba_files]
-    multiqc_files = [dxpy.DXFile(item) for item in multiqc_files]
+    starfusion_files = [to_dxfile(item) for item in starfusion_files]
+    fusioninspector_files = [to_dxfile(item) for item in fusioninspector_files]
+    arriba_files = [to_dxfile(item) for item in arriba_files]
+    multiqc_files = [to_dxfile(item) for item in multiqc_files]
     fastqc_data = get_dxfile(multiqc_files, "multiqc_fastqc.txt")
-    sf_previous_data = dxpy.DXFile(SF_previous_runs_data)
-    ref_sources = dxpy.DXFile(reference_sources)
-    previous_positives = dxpy.DXFile(previous_positives)
-
-    df_starfusion = parse_star_fusion(starfusion_files)
-    df_fusioninspector = parse_fusion_inspector(fusioninspector_files)
-    df_arriba = parse_arriba(arriba_files)
-    df_fastqc = parse_fastqc(fastqc_data)
-    df_sf_previous = parse_sf_previous(sf_previous_data)
-    df_ref_sources = read_dxfile(ref_sources, include_fname=False)
-    df_prev_pos = parse_prev_pos(previous_positives)
+    sf_previous_data = to_dxfile(SF_previous_runs_data)
+    ref_sources = to_dxfile(reference_sources)
+    previous_positives = to_dxfile(previous_positives)
+
+    # Inputs are independent; parse them concurrently to overlap downloads
+    with ThreadPoolExecutor() as executor:
+        sf_future = executor.submit(parse_star_fusion, starfusion_files)
+        fi_future = executor.submit(parse_fusion_inspector, fusioninspector_files)
+        arriba_future = executor.submit(parse_arriba, arriba_files)
+        fastqc_future = executor.submit(parse_fastqc, fastqc_data)
+        sf_previous_future = executor.submit(parse_sf_previous, sf_previous_data)
+        ref_sources_future = executor.submit(
+            read_dxfile, ref_sources, include_fname=False
+        )
+        prev_pos_future = executor.submit(parse_prev_pos, previous_positives)
+
+    df_starfusion = sf_future.result()
+    df_fusioninspector = fi_future.result()
+    df_arriba = arriba_future.result()
+    df_fastqc = fastqc_future.result()
+    df_sf_previous = sf_previous_future.result()
+    df_ref_sources = ref_sources_future.result()
+    df_prev_pos = prev_pos_future.result()
 
     project_name, _ = get_project_info()
     outfile = f"{project_name}_fusion_workbook.xlsx"
@@ -2,6 +2,8 @@
 Tests for excel.py module
 """
 
+from unittest.mock import MagicMock
+
 import pandas as pd
 import pytest
 from openpyxl import Workbook
@@ -9,6 +11,7 @@ from openpyxl.styles import PatternFill
 from openpyxl.worksheet.worksheet import Worksheet
 
 from utils import excel
+from utils.defaults import SF_SHEET_CONFIG
 
 
 class TestExcelUtils:
@@ -36,23 +39,20 @@ class TestExcelUtils:
         assert worksheet.cell(1, 1).value == "ExtraCol"
         assert worksheet.cell(2, 1).value == "=A2+1"
 
+    def test_render_formula(self):
+        """Test rendering a split formula template for a row."""
+        parts = excel.split_formula(SF_SHEET_CONFIG["extra_cols"]["EPIC"])
+        assert excel.render_formula(parts, 7) == "=VLOOKUP(A7,'EPIC'!AJ:AK,2,0)"
+
+        parts = excel.split_formula(SF_SHEET_CONFIG["extra_cols"]["ID"])
+        assert excel.render_formula(parts, 3) == '=CONCATENATE(A3,"_",L3)'
+
     def test_apply_header_format(self, worksheet):
         """Test applying bold formatting to header row."""
         excel.apply_header_format(worksheet)
         assert worksheet["A1"].font.bold is True
         assert worksheet["B1"].font.bold is True
 
-    def test_adjust_column_widths(self, worksheet):
-        """Test adjusting column widths based on content length."""
-        worksheet["A2"] = "short"
-        worksheet["B2"] = "a much longer string"
-        excel.adjust_column_widths(worksheet)
-        # Will be improve to get the actual width in excel units
-        assert (
-            worksheet.column_dimensions["B"].width
-            > worksheet.column_dimensions["A"].width
-        )
-
     def test_set_tab_color(self, worksheet):
         """Test setting worksheet tab color."""
         excel.set_tab_color(worksheet, "FFFF00FF")
@@ -79,6 +79,13 @@ class TestExcelUtils:
         """Test retrieving Excel column letter from a header name."""
         assert excel.get_col_letter(worksheet, "Header2") == "B"
 
+    def test_get_col_letter_first_match(self, worksheet):
+        """Test lookup skips blank headers and returns the first match."""
+        worksheet["D1"] = None
+        worksheet["E1"] = " Header2"
+        assert excel.get_col_letter(worksheet, "Header2") == "B"
+        assert excel.get_col_letter(worksheet, "Missing") is None
+
     def test_drop_column(self, worksheet):
         """Test removing a column by header name."""
         result = excel.drop_column(worksheet, "Header2")
@@ -116,9 +123,93 @@ class TestExcelUtils:
         )
         assert worksheet["B1"].value == "Review"
         assert worksheet.column_dimensions["B"].width >= len("Review") + 2
+        (dv,) = worksheet.data_validations.dataValidation
+        assert str(dv.sqref) == "B2:B4"
 
     def test_colour_hyperlinks(self, worksheet):
         """Test formatting font color of hyperlink cells."""
         worksheet["A2"].value = '=HYPERLINK("http://example.com", "Example")'
         excel.colour_hyperlinks(worksheet)
         assert worksheet["A2"].font.color.rgb.lower().endswith("00007f")
+
+    def test_colour_hyperlinks_in_columns(self, worksheet):
+        """Test only the given columns are checked for hyperlinks."""
+        link = '=HYPERLINK("http://example.com", "Example")'
+        worksheet["A2"].value = link
+        worksheet["B2"].value = link
+        excel.colour_hyperlinks(worksheet, ["B"])
+        assert worksheet["A2"].font != excel.HYPERLINK_FONT
+        assert worksheet["B2"].font.color.rgb.lower().endswith("00007f")
+
+    def test_append_df_rows(self):
+        """Test streaming DataFrame rows matches to_excel cell values."""
+        ws = Workbook().active
+        df = pd.DataFrame(
+            {
+                "Name": ["A--B", None],
+                "Count": [1.5, float("nan")],
+                "Fusions": [["A--B"], []],
+            }
+        )
+        excel.append_df_rows(ws, df)
+        assert [c.value for c in ws[1]] == ["Name", "Count", "Fusions"]
+        assert ws["A1"].font.bold is True
+        assert [c.value for c in ws[2]] == ["A--B", 1.5, "['A--B']"]
+        assert ws["A3"].value is None
+        assert ws["B3"].value is None
+
+    def test_append_df_rows_with_extra_cols(self):
+        """Test formula columns match those added by add_extra_columns."""
+        df = pd.DataFrame({"A": [1, 2], "B": ["x", "y"]})
+        extra_cols = {"SUM": "=A{row}+1"}
+
+        expected = Workbook().active
+        excel.append_df_rows(expected, df)
+        excel.add_extra_columns(expected, extra_cols, start_col=2)
+
+        ws = Workbook().active
+        excel.append_df_rows(ws, df, extra_cols, start_col=2)
+
+        assert [[c.value for c in row] for row in ws.iter_rows()] == [
+            [c.value for c in row] for row in expected.iter_rows()
+        ]
+        assert ws["B1"].font.b is False and ws["C1"].font.b is True
+
+    def test_adjust_column_widths_from_df(self, worksheet):
+        """Test widths from source data match a scan of the written cells."""
+        df = pd.DataFrame({"Header1": ["short"], "Header2": ["a much longer string"]})
+        excel.adjust_column_widths_from_df(worksheet, df, {"Extra": "=A{row}"}, 2)
+        assert worksheet.column_dimensions["A"].width == 16
+        assert worksheet.column_dimensions["B"].width == 16
+        assert worksheet.column_dimensions["C"].width == len("a much longer string") + 2
+
+    def test_hyperlink_breakpoints(self):
+        """Test breakpoint columns become hyperlink formulas on a copy."""
+        df = pd.DataFrame(
+            {"LeftBreakpoint": ["chr1:123:+", None], "FFPM": [1.0, 2.0]}
+        )
+        result = excel.hyperlink_breakpoints(df)
+        assert result["LeftBreakpoint"].tolist() == [
+            '=HYPERLINK("https://varsome.com/position/hg38/chr1%3A123", "chr1:123:+")',
+            None,
+        ]
+        assert df["LeftBreakpoint"].iloc[0] == "chr1:123:+"
+        ffpm = df[["FFPM"]]
+        assert excel.hyperlink_breakpoints(ffpm) is ffpm
+
+    def test_last_group_rows(self):
+        """Test group boundaries match groupby tail on sorted data."""
+        df = pd.DataFrame({"SPECIMEN": ["SP1", "SP1", "SP2", None, "SP3", "SP3"]})
+        expected = df.groupby("SPECIMEN").tail(1).index
+
+        assert excel.last_group_rows(df, "SPECIMEN").equals(expected)
+        assert excel.last_group_rows(df.iloc[:0], "SPECIMEN").empty
+
+    def test_create_blank_sheet(self):
+        """Test creating an empty sheet with tab colour on the writer book."""
+        writer = MagicMock()
+        writer.book = Workbook()
+        ws = excel.create_blank_sheet(writer, "EPIC", "48B7D9")
+        assert ws.title == "EPIC"
+        assert ws.max_row == 1 and ws["A1"].value is None
+        assert ws.sheet_properties.tabColor.rgb.endswith("48B7D9")
@@ -23,6 +23,24 @@ class TestParsingHelpers:
         sample = "12345678-2XXXXSXXX-25PCAN4-10011_S33_L001_R1"
         assert parser.parse_igv_specimen_name(sample) == "12345678-2XXXXSXXX-25PCAN4"
 
+    def test_specimen_patterns_match_helpers(self):
+        """Column-wise patterns should agree with the scalar helpers."""
+        samples = pd.Series(
+            ["12345678-2XXXXSXXX-25PCAN4-10011_S33_L001_R1", "1-SP1", "1-SP1-RUN"]
+        )
+        specimens = samples.str.extract(parser.SPECIMEN_PATTERN, expand=False)
+        names = samples.str.extract(parser.FILE_NAME_PATTERN)
+
+        assert specimens.tolist() == samples.apply(parser.parse_specimen_id).tolist()
+        assert (
+            names["SPECIMEN"].tolist()
+            == samples.apply(parser.parse_specimen_id).tolist()
+        )
+        assert (
+            names["Filename"].tolist()
+            == samples.apply(parser.parse_igv_specimen_name).tolist()
+        )
+
     def test_extract_fusions_valid_cases(self):
         """Should identify valid fusion gene pairs and normalize to -- format."""
         text = "EML4::ALK, TPM3 - ROS1, EWSR1::SMAD3-rearranged"
@@ -36,6 +54,11 @@ class TestParsingHelpers:
         result = parser.extract_fusions(text)
         assert result == []
 
+    def test_extract_fusions_missing_text(self):
+        """Empty cells read as NaN / None should give no fusions."""
+        for text in (None, float("nan"), ""):
+            assert parser.extract_fusions(text) == []
+
 
 class TestFastQC:
     """Unit tests for parsing and processing FastQC data."""
@@ -110,7 +133,9 @@ class TestParseFusion:
                 "Count_predicted": [1, 1, 2],
             }
         )
-        with patch("utils.parser.read_dxfile", return_value=df):
+        # duplicate split across chunks should still be dropped
+        chunks = iter([df.iloc[[0]], df.iloc[[1, 2]]])
+        with patch("utils.parser.read_dxfile", return_value=chunks):
             result = parser.parse_sf_previous(mock_dxfile)
             assert list(result["#FusionName"]) == ["A--B", "C--D"]
 
@@ -127,11 +152,42 @@ class TestParseFusion:
             assert "#FusionName" in result.columns
             assert isinstance(result["#FusionName"].iloc[0], list)
 
+    def test_parse_prev_pos_without_separator(self, mock_dxfile):
+        """Should give an empty fusion list for results without a separator."""
+        df = pd.DataFrame(
+            {
+                "Specimen Identifier": ["SP1", "SP2", "SP3"],
+                "Test Result": [" No fusion detected", "EML4::ALK", None],
+            }
+        )
+        with patch("utils.parser.read_dxfile", return_value=df):
+            result = parser.parse_prev_pos(mock_dxfile)
+            assert result["#FusionName"].tolist() == [[], ["EML4--ALK"], []]
+
     def test_parse_star_fusion_empty(self):
         """Should return empty DataFrame if no input files."""
         result = parser.parse_star_fusion([])
         assert result.empty
 
+    def test_parse_star_fusion_concat(self):
+        """Should concatenate files in input order with a unique index."""
+        file1, file2 = MagicMock(), MagicMock()
+        dfs = {
+            file1: pd.DataFrame({"file_name": ["f1", "f1"], "FFPM": [1.0, 2.0]}),
+            file2: pd.DataFrame({"file_name": ["f2"], "FFPM": [3.0]}),
+        }
+        # files are read concurrently, so look frames up by file
+        with patch("utils.parser.read_dxfile", side_effect=dfs.get):
+            result = parser.parse_star_fusion([file1, file2])
+            assert result["file_name"].tolist() == ["f1", "f1", "f2"]
+            assert result.index.is_unique
+
+    def test_parse_star_fusion_single_file_error(self, mock_dxfile):
+        """A failing single file should give an empty frame, not raise."""
+        with patch("utils.parser.read_dxfile", side_effect=ValueError("bad")):
+            result = parser.parse_star_fusion([mock_dxfile])
+            assert result.empty
+
     def test_parse_fusion_inspector(self, mock_dxfile):
         """Should parse fusion inspector and adjust file name column."""
         df = pd.DataFrame(
@@ -255,3 +311,9 @@ class TestMakeSfPivot:
         assert row["#FusionName"] == "A--B"
         assert row["FRAME"] == "in-frame"
         assert row["ReferenceSources"] == "ChimerKDB"
+
+    def test_input_frame_is_not_modified(self):
+        """make_sf_pivot does not add columns to the caller's frames."""
+        assert "SPECIMEN" not in self.sf_df.columns
+        assert "LEFTRIGHT" not in self.sf_df.columns
+        assert "LEFTRIGHT" not in self.fi_df.columns
@@ -8,11 +8,16 @@ import pandas as pd
 import pytest
 
 from utils.utils import (
+    _describe_project_name,
+    _dxfile,
     create_pivot_table,
-    generate_varsome_url,
+    download_dxfile,
+    generate_varsome_urls,
     get_dxfile,
     get_project_info,
+    index_dxfiles,
     read_dxfile,
+    to_dxfile,
     validate_config,
 )
 
@@ -27,7 +32,9 @@ class TestReadDxFile:
 
     def test_read_dxfile_with_filename(self):
         """Adds dummy row and file_name column when include_fname=True"""
-        with patch("pandas.read_csv", return_value=self.test_data):
+        with patch("pandas.read_csv", return_value=self.test_data), patch(
+            "utils.utils.download_dxfile", return_value="test_file.txt"
+        ):
             result = read_dxfile(self.mock_dxfile, include_fname=True)
 
             # Check that file_name column was added
@@ -44,12 +51,69 @@ class TestReadDxFile:
 
     def test_read_dxfile_without_filename(self):
         """Returns unmodified DataFrame when include_fname=False"""
-        with patch("pandas.read_csv", return_value=self.test_data):
+        with patch("pandas.read_csv", return_value=self.test_data), patch(
+            "utils.utils.download_dxfile", return_value="test_file.txt"
+        ):
             result = read_dxfile(self.mock_dxfile, include_fname=False)
 
             assert "file_name" not in result.columns
             pd.testing.assert_frame_equal(result, self.test_data)
 
+    def test_read_dxfile_chunked(self):
+        """Yields chunks with the dummy row only in the first chunk"""
+        chunks = [self.test_data.iloc[[0]], self.test_data.iloc[[1]]]
+        with patch("pandas.read_csv", return_value=iter(chunks)), patch(
+            "utils.utils.download_dxfile", return_value="test_file.txt"
+        ):
+            result = list(read_dxfile(self.mock_dxfile, chunksize=1))
+
+            assert [len(chunk) for chunk in result] == [2, 1]
+            combined = pd.concat(result, ignore_index=True)
+            assert combined.shape == (3, 3)
+            assert (combined["file_name"] == "test_file.txt").all()
+            assert pd.isna(combined.iloc[0]["col1"])
+
+    def test_read_dxfile_empty_file(self, tmp_path):
+        """An empty download raises pandas' EmptyDataError"""
+        path = tmp_path / "empty.tsv"
+        path.touch()
+        with patch("utils.utils.download_dxfile", return_value=str(path)):
+            with pytest.raises(pd.errors.EmptyDataError):
+                read_dxfile(self.mock_dxfile)
+
+
+class TestDownloadDxFile:
+    """Tests for caching DNAnexus file downloads"""
+
+    def test_download_dxfile_cached(self, tmp_path, monkeypatch):
+        """Downloads once and reuses the cached copy on later calls"""
+        monkeypatch.setenv("DX_CACHE_DIR", str(tmp_path))
+        mock_dxfile = MagicMock()
+        mock_dxfile.get_id.return_value = "file-1234"
+
+        def fake_download(dxid, filename, **kwargs):
+            with open(filename, "w") as fh:
+                fh.write("col1\n")
+
+        with patch("dxpy.download_dxfile", side_effect=fake_download) as mock_dl:
+            first = download_dxfile(mock_dxfile)
+            second = download_dxfile(mock_dxfile)
+
+        assert first == second == str(tmp_path / "file-1234")
+        mock_dl.assert_called_once()
+
+    def test_download_dxfile_failure_leaves_no_part(self, tmp_path, monkeypatch):
+        """A failed download removes its temporary file"""
+        monkeypatch.setenv("DX_CACHE_DIR", str(tmp_path))
+        mock_dxfile = MagicMock()
+        mock_dxfile.get_id.return_value = "file-1234"
+
+        with patch("dxpy.download_dxfile", side_effect=IOError("network")):
+            with pytest.raises(IOError):
+                download_dxfile(mock_dxfile)
+
+        assert list(tmp_path.iterdir()) == []
+
 
 class TestCreatePivotTable:
     """Tests for pivot table generation"""
@@ -79,6 +143,9 @@ class TestCreatePivotTable:
 class TestProjectUtils:
     """Tests for DNAnexus project info and file selection"""
 
+    def setup_method(self):
+        _describe_project_name.cache_clear()
+
     @patch("dxpy.describe")
     @patch("os.environ.get")
     def test_get_project_info(self, mock_env_get, mock_describe):
@@ -88,8 +155,18 @@ class TestProjectUtils:
         name, proj_id = get_project_info()
         assert name == "test_project"
         assert proj_id == "project-1234"
+
+        # repeated lookups reuse the cached describe
+        assert get_project_info() == (name, proj_id)
         mock_describe.assert_called_once_with("project-1234")
 
+    @patch("dxpy.describe")
+    @patch("os.environ.get", return_value=None)
+    def test_get_project_info_without_project(self, mock_env_get, mock_describe):
+        with pytest.raises(ValueError, match="DX_PROJECT_CONTEXT_ID"):
+            get_project_info()
+        mock_describe.assert_not_called()
+
     def test_get_dxfile_success(self):
         file1 = MagicMock()
         file1.name = "file1.txt"
@@ -105,6 +182,33 @@ class TestProjectUtils:
         with pytest.raises(ValueError, match="not found"):
             get_dxfile([file1], "nonexistent.txt")
 
+    def test_get_dxfile_from_index(self):
+        file1 = MagicMock()
+        file1.name = "target.txt"
+
+        index = index_dxfiles([file1, file1])
+        assert get_dxfile(index, "target.txt") is file1
+
+    def test_index_dxfiles_duplicate_names(self):
+        file1 = MagicMock()
+        file1.name = "target.txt"
+        file2 = MagicMock()
+        file2.name = "target.txt"
+        with pytest.raises(ValueError, match="Multiple files"):
+            index_dxfiles([file1, file2])
+
+    @patch("utils.utils.dxpy.DXFile")
+    def test_to_dxfile_reuses_handler(self, mock_dxfile):
+        _dxfile.cache_clear()
+
+        to_dxfile({"$dnanexus_link": "file-reuse"})
+        to_dxfile("file-reuse")
+        to_dxfile({"$dnanexus_link": {"id": "file-reuse", "project": "project-1"}})
+
+        mock_dxfile.assert_any_call("file-reuse", project=None)
+        mock_dxfile.assert_any_call("file-reuse", project="project-1")
+        assert mock_dxfile.call_count == 2
+
 
 class TestConfigValidation:
     """Tests for validating configuration dicts"""
@@ -133,6 +237,7 @@ class TestVarsomeURL:
             ("invalid", "https://varsome.com/position/hg38/invalid"),
         ],
     )
-    def test_generate_varsome_url(self, bp, expected_url):
-        url = generate_varsome_url(bp)
-        assert url == expected_url
+    def test_generate_varsome_urls(self, bp, expected_url):
+        urls = generate_varsome_urls(pd.Series([bp], index=[5]))
+        assert urls.tolist() == [expected_url]
+        assert urls.index.tolist() == [5]
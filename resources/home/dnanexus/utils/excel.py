@@ -1,17 +1,68 @@
 """utilities for formating summary sheet
 """
 
+import numpy as np
 import openpyxl
 import pandas as pd
+from pandas.api.types import is_list_like
 from openpyxl.styles import PatternFill, Border, Side, Alignment, DEFAULT_FONT, Font
 from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.worksheet.worksheet import Worksheet
 
-from .utils import generate_varsome_url
+from .utils import generate_varsome_urls
 
 DEFAULT_FONT.name = "Calibri"
 DEFAULT_FONT.size = 11
 
+# header style matching the one pandas applies in df.to_excel
+HEADER_FONT = Font(bold=True)
+THIN_SIDE = Side(style="thin")
+THIN_BORDER = Border(left=THIN_SIDE, right=THIN_SIDE, top=THIN_SIDE, bottom=THIN_SIDE)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+HYPERLINK_FONT = Font(color="00007f", name=DEFAULT_FONT.name)
+# thick bottom border marking the last row of a specimen group
+SPECIMEN_BORDER = Border(
+    left=THIN_SIDE, right=THIN_SIDE, top=THIN_SIDE, bottom=Side(style="thick")
+)
+
+
+def split_formula(formula: str) -> list[str]:
+    """
+    Splits a formula template on its {row} placeholders, so it can be
+    rendered for many rows without rescanning the template.
+
+    Parameters
+    ----------
+    formula : str
+        Excel formula template, e.g. "=VLOOKUP(A{row},'EPIC'!AJ:AK,2,0)"
+
+    Returns
+    -------
+    list[str]
+        Template parts around each {row} placeholder
+    """
+    return formula.split("{row}")
+
+
+def render_formula(parts: list[str], row: int) -> str:
+    """
+    Renders a split formula template for the given row.
+
+    Parameters
+    ----------
+    parts : list[str]
+        Template parts as returned by split_formula
+    row : int
+        The row index (1-based) to substitute for {row}
+
+    Returns
+    -------
+    str
+        Excel formula for the row
+    """
+    return str(row).join(parts)
+
 
 def add_extra_columns(
     worksheet: Worksheet,
@@ -47,8 +98,11 @@ def add_extra_columns(
 
     for i, (col, formula) in enumerate(extra_cols.items(), start=start_col):
         worksheet.cell(row=1, column=i, value=col)
-        for row in range(2, end_row + 1):
-            worksheet.cell(row=row, column=i, value=formula.replace("{row}", str(row)))
+        parts = split_formula(formula)
+        for (cell,) in worksheet.iter_rows(
+            min_row=2, max_row=end_row, min_col=i, max_col=i
+        ):
+            cell.value = render_formula(parts, cell.row)
 
 
 def apply_header_format(worksheet: Worksheet) -> None:
@@ -64,22 +118,52 @@ def apply_header_format(worksheet: Worksheet) -> None:
     -------
     None
     """
-    header_font = Font(bold=True)
-    for col in range(1, worksheet.max_column + 1):
-        cell = worksheet.cell(row=1, column=col)
-        cell.font = header_font
+    # iter_rows resolves the sheet width once for the whole header row
+    for header_cells in worksheet.iter_rows(min_row=1, max_row=1):
+        for cell in header_cells:
+            cell.font = HEADER_FONT
+
+
+def _max_value_length(values: pd.Series, header) -> int:
+    """
+    Length of the longest value (or header) as written to a sheet cell,
+    ignoring empty values and formulas, which display their result.
+    """
+    header = str(header) if header else ""
+    longest = 0 if header.startswith("=") else len(header)
+
+    values = values[values.notna()].astype(object)
+    values = values[values.astype(bool)].astype(str)
+    values = values[~values.str.startswith("=")]
+    if not values.empty:
+        longest = max(longest, values.str.len().max())
 
+    return longest
 
-def adjust_column_widths(
-    worksheet: Worksheet, min_width: int = 14, max_width: int = 40
+
+def adjust_column_widths_from_df(
+    worksheet: Worksheet,
+    df: pd.DataFrame,
+    extra_cols: dict[str, str] | None = None,
+    start_col: int = 1,
+    min_width: int = 14,
+    max_width: int = 40,
 ) -> None:
     """
-    Adjusts all column widths in given sheet for better visibility.
+    Adjusts column widths of a sheet written from a DataFrame, using
+    vectorised string lengths of the source data instead of re-reading
+    every cell of the worksheet.
 
     Parameters
     ----------
     worksheet : Worksheet
         The worksheet where column widths will be adjusted.
+    df : pd.DataFrame
+        The DataFrame written to the sheet.
+    extra_cols : dict[str, str], optional
+        Formula columns inserted at start_col; only headers count.
+    start_col : int, optional
+        The column index (1-based) where extra columns were inserted.
     min_width : int
         The min width a column should have.
     max_width : int
@@ -89,17 +173,21 @@ def adjust_column_widths(
     -------
     None
     """
-    for col_cells in worksheet.columns:
-        col_letter = col_cells[0].column_letter
-        _max = min_width
+    lengths = [
+        _max_value_length(df.iloc[:, idx], header)
+        for idx, header in enumerate(df.columns)
+    ]
 
-        for cell in col_cells:
-            val = cell.value
-            if val and not (isinstance(val, str) and val.startswith("=")):
-                _max = max(_max, len(str(val)))
+    if extra_cols:
+        extra = [len(str(col)) for col in extra_cols]
+        padding = [0] * max(0, start_col - 1 - len(lengths))
+        lengths = lengths[: start_col - 1] + padding + extra + lengths[start_col - 1 :]
 
-        # Set column width with a cap of max_width
-        worksheet.column_dimensions[col_letter].width = min(_max + 2, max_width)
+    for col_idx, length in enumerate(lengths, start=1):
+        col_letter = openpyxl.utils.get_column_letter(col_idx)
+        worksheet.column_dimensions[col_letter].width = min(
+            max(min_width, length) + 2, max_width
+        )
 
 
 def set_tab_color(worksheet: Worksheet, hex_color: str) -> None:
@@ -125,18 +213,45 @@ def style_borders(worksheet: Worksheet, style: str = "thin") -> None:
     style : str, optional
         desired border style to apply, by default "thin"
     """
-    border = Border(
-        left=Side(style=style),
-        right=Side(style=style),
-        top=Side(style=style),
-        bottom=Side(style=style),
-    )
+    if style == "thin":
+        border = THIN_BORDER
+    else:
+        side = Side(style=style)
+        border = Border(left=side, right=side, top=side, bottom=side)
 
     for row in worksheet.iter_rows():
         for cell in row:
             cell.border = border
 
 
+def last_group_rows(df: pd.DataFrame, index_col: str) -> pd.Index:
+    """Finds the last row of each specimen group in sorted summary data.
+
+    Groups are runs of equal values, so one comparison against the next
+    row finds every boundary without building a groupby.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data frame sorted (grouped) by index_col
+    index_col : str
+        Column to use for grouping
+
+    Returns
+    -------
+    pd.Index
+        Index labels of the last row of each group, skipping missing values
+        as groupby does
+    """
+    if df.empty:
+        return df.index
+
+    values = df[index_col].to_numpy()
+    is_last = np.append(values[:-1] != values[1:], True)
+
+    return df.index[is_last & df[index_col].notna().to_numpy()]
+
+
 def highlight_specimen_borders(
     worksheet: Worksheet, df: pd.DataFrame, index_col: str
 ) -> None:
@@ -151,21 +266,20 @@ def highlight_specimen_borders(
     index_col : str
         Column to use for grouping"
     """
-    thick_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thick"),
-    )
-
     # Find last row of each specimen group
-    last_rows = df.groupby(index_col).tail(1).index
+    last_rows = last_group_rows(df, index_col)
+
+    # max_column scans every stored cell; read it once, not per group
+    max_col = worksheet.max_column
 
     # Apply border to last row of each group
     for row in last_rows:
         excel_row = row + 2
-        for col in range(1, worksheet.max_column + 1):
-            worksheet.cell(row=excel_row, column=col).border = thick_border
+        for cells in worksheet.iter_rows(
+            min_row=excel_row, max_row=excel_row, max_col=max_col
+        ):
+            for cell in cells:
+                cell.border = SPECIMEN_BORDER
 
 
 def alternate_specimen_colors(
@@ -204,15 +318,19 @@ def alternate_specimen_colors(
         raise ValueError(f"stop_col '{stop_col}' not found in worksheet.")
     stop_idx = openpyxl.utils.column_index_from_string(col_letter)
 
-    last_rows = df.groupby(index_col).tail(1).index
+    last_rows = last_group_rows(df, index_col)
     current_row = start_row_idx
 
     for idx, last_row in enumerate(last_rows):
         fill = colors[idx % len(colors)]
         last_row = last_row + start_row_idx + 1
-        for row in range(current_row, last_row):
-            for col in range(1, stop_idx):
-                worksheet.cell(row=row, column=col).fill = fill
+        # iter_rows treats max_col=0 as the whole sheet; nothing to fill then
+        if stop_idx > 1:
+            for cells in worksheet.iter_rows(
+                min_row=current_row, max_row=last_row - 1, max_col=stop_idx - 1
+            ):
+                for cell in cells:
+                    cell.fill = fill
 
         current_row = last_row
 
@@ -279,11 +397,12 @@ def set_column_font_colour(worksheet: Worksheet, col_letter: str, hex_color: str
     hex_color : str
         Hex colour code for the sheet tab
     """
+    font = Font(color=hex_color, name=DEFAULT_FONT.name)
     for cell in worksheet[col_letter]:
-        cell.font = Font(color=hex_color, name=DEFAULT_FONT.name)
+        cell.font = font
 
 
-def colour_hyperlinks(worksheet: Worksheet) -> None:
+def colour_hyperlinks(worksheet: Worksheet, col_letters: list[str] = None) -> None:
     """
     Set text colour to blue if text contains hyperlink
 
@@ -291,11 +410,19 @@ def colour_hyperlinks(worksheet: Worksheet) -> None:
     ----------
     worksheet : openpyxl.worksheet.worksheet.Worksheet
         The target Excel worksheet
+    col_letters : list[str], optional
+        Columns to check (e.g. ['B', 'D']). Checks every cell if not given
     """
-    for cells in worksheet.rows:
+    if col_letters is None:
+        columns = worksheet.rows
+    else:
+        columns = (worksheet[col_letter] for col_letter in col_letters)
+
+    for cells in columns:
         for cell in cells:
-            if "HYPERLINK" in str(cell.value):
-                cell.font = Font(color="00007f", name=DEFAULT_FONT.name)
+            # only text cells can hold a hyperlink formula
+            if isinstance(cell.value, str) and "HYPERLINK" in cell.value:
+                cell.font = HYPERLINK_FONT
 
 
 def add_drop_down_col(
@@ -339,6 +466,8 @@ def add_drop_down_col(
     # Create data validation for dropdown
     options = f'"{",".join(dropdown_options)}"'
 
+    # NB: showDropDown=False is what *shows* the in-cell arrow; the OOXML
+    # attribute actually means "suppress drop down"
     dv = DataValidation(
         type="list",
         formula1=options,
@@ -349,9 +478,11 @@ def add_drop_down_col(
     dv.promptTitle = title
     ws.add_data_validation(dv)
 
-    # Applly to all rows
-    for row in range(start + 1, ws.max_row + 1):
-        dv.add(ws[f"{col_letter}{row}"])
+    # Apply to all rows as one range; adding cells one at a time checks
+    # each against every range added so far
+    max_row = ws.max_row
+    if max_row > start:
+        dv.add(f"{col_letter}{start + 1}:{col_letter}{max_row}")
 
     dv.showInputMessage = True
     dv.showErrorMessage = True
@@ -379,57 +510,49 @@ def add_hyperlink(cell: openpyxl.cell.cell.Cell, url: str, text: str = None) ->
 
     if url:
         cell.value = f'=HYPERLINK("{url}", "{value}")'
+        cell.font = HYPERLINK_FONT
 
 
-def add_breakpoint_hyperlinks(
-    writer: pd.ExcelWriter,
+def hyperlink_breakpoints(
+    df: pd.DataFrame,
     breakpoint_columns: tuple[str, str] = ("leftbreakpoint", "rightbreakpoint"),
-    header_row: int = 1,
-) -> None:
+) -> pd.DataFrame:
     """
-    Apply VarSome hyperlinks to breakpoint columns across all sheets in the workbook.
+    Convert breakpoint columns of a DataFrame to VarSome hyperlink formulas
+    before the DataFrame is written to a sheet.
 
     Parameters
     ----------
-    writer : pd.ExcelWriter
-        The pandas openpyxl ExcelWriter
+    df : pd.DataFrame
+        The DataFrame to be written to a sheet
     breakpoint_columns : tuple[str, str]
-        Column names to check for breakpoints.
-    header_row : int
-        Row number where headers are located (1-based).
-    """
-
-    for sheet_name, worksheet in writer.sheets.items():
-        max_col = worksheet.max_column
-        max_row = worksheet.max_row
+        Column names (case-insensitive) to check for breakpoints.
 
-        # Get header row values
-        headers = [
-            worksheet.cell(row=header_row, column=col).value
-            for col in range(1, max_col + 1)
-        ]
-        headers = [
-            col.strip().lower() if isinstance(col, str) else "" for col in headers
-        ]
+    Returns
+    -------
+    pd.DataFrame
+        Copy of df with hyperlinked breakpoints, or df itself if it has no
+        breakpoint columns
+    """
+    headers = [
+        col.strip().lower() if isinstance(col, str) else "" for col in df.columns
+    ]
+    col_idxs = [headers.index(col) for col in breakpoint_columns if col in headers]
+    if not col_idxs:
+        return df
 
-        for bp_col in breakpoint_columns:
-            if bp_col not in headers:
-                continue
+    df = df.copy()
+    for col_idx in col_idxs:
+        values = df.iloc[:, col_idx]
+        is_text = values.map(lambda v: isinstance(v, str) and v != "")
+        text = values[is_text]
+        links = '=HYPERLINK("' + generate_varsome_urls(text) + '", "' + text + '")'
 
-            col_idx = headers.index(bp_col) + 1
-            col_letter = openpyxl.utils.get_column_letter(col_idx)
+        hyperlinked = values.to_numpy(dtype=object, copy=True)
+        hyperlinked[is_text.to_numpy(dtype=bool)] = links.to_numpy()
+        df.isetitem(col_idx, hyperlinked)
 
-            for row in range(header_row + 1, max_row + 1):
-                cell = worksheet[f"{col_letter}{row}"]
-                value = cell.value
-                if value and isinstance(value, str):
-                    try:
-                        url = generate_varsome_url(value)
-                        add_hyperlink(cell, url, value)
-                    except Exception as e:
-                        print(
-                            f"Could not process {value} at {sheet_name}!{col_letter}{row}: {e}"
-                        )
+    return df
 
 
 def get_col_letter(worksheet: Worksheet, col_name: str) -> str:
@@ -445,14 +568,18 @@ def get_col_letter(worksheet: Worksheet, col_name: str) -> str:
     Return
     -------
     str
-        column letter for specific column name
+        column letter for specific column name, None if not found
     """
-    col_letter = None
-    for column_cell in worksheet.iter_cols(1, worksheet.max_column):
-        if column_cell[0].value.strip() == col_name:
-            col_letter = column_cell[0].column_letter
+    # only the header row is needed; not cached as sheets are restructured
+    # (inserted / deleted columns, rotated headers) between lookups
+    headers = worksheet.iter_cols(
+        1, worksheet.max_column, max_row=1, values_only=True
+    )
+    for idx, (header,) in enumerate(headers, start=1):
+        if isinstance(header, str) and header.strip() == col_name:
+            return openpyxl.utils.get_column_letter(idx)
 
-    return col_letter
+    return None
 
 
 def drop_column(worksheet: Worksheet, col_name: str) -> bool:
@@ -494,11 +621,12 @@ def rotate_headers(sheet: Worksheet, header_row: int = 1, degree: int = 90) -> N
     degree : int, optional
         The degree of rotation to apply (0-180), by default 90
     """
+    # one shared Alignment for every header cell
     alignment = Alignment(textRotation=degree, vertical="bottom", horizontal="center")
-    for col in range(1, sheet.max_column + 1):
-        cell = sheet.cell(row=header_row, column=col)
-        cell.alignment = alignment
-        cell.value = f" {cell.value}"
+    for header_cells in sheet.iter_rows(min_row=header_row, max_row=header_row):
+        for cell in header_cells:
+            cell.alignment = alignment
+            cell.value = f" {cell.value}"
 
     sheet.row_dimensions[header_row].height = 130
 
@@ -529,12 +657,96 @@ def format_columns_to_two_dp(
         header = str(header_cell.value).strip() if header_cell.value else ""
 
         if header in target_headers:
-            col_letter = header_cell.column_letter
-            for row in range(header_row + 1, max_row + 1):
-                cell = worksheet.cell(row=row, column=col)
+            for (cell,) in worksheet.iter_rows(
+                min_row=header_row + 1, max_row=max_row, min_col=col, max_col=col
+            ):
                 cell.number_format = number_format
 
 
+def create_blank_sheet(
+    writer: pd.ExcelWriter, sheet_name: str, tab_color: str = "000000"
+) -> Worksheet:
+    """Creates an empty sheet directly on the writer's workbook
+
+    Parameters
+    ----------
+    writer : pd.ExcelWriter
+        The Excel writer object to create the sheet in
+    sheet_name : str
+        Name of the Excel sheet
+    tab_color : str, optional
+        Hex colour code for the sheet tab. Defaults to black ("000000")
+
+    Returns
+    -------
+    Worksheet
+        The created worksheet
+    """
+    worksheet = writer.book.create_sheet(sheet_name)
+    set_tab_color(worksheet, tab_color)
+
+    return worksheet
+
+
+def append_df_rows(
+    worksheet: Worksheet,
+    df: pd.DataFrame,
+    extra_cols: dict[str, str] = None,
+    start_col: int = 1,
+) -> None:
+    """
+    Streams header and rows of a DataFrame onto an empty worksheet.
+
+    Rows are appended as plain tuples, avoiding the per-cell style
+    handling of df.to_excel. Missing values are written as empty cells
+    and list-like values as text, as df.to_excel does.
+
+    Parameters
+    ----------
+    worksheet : Worksheet
+        The (empty) worksheet to write into
+    df : pd.DataFrame
+        The DataFrame containing the data.
+    extra_cols : dict[str, str], optional
+        A mapping of column names to Excel formulas, written into each row
+        as add_extra_columns would, without shifting the written cells.
+    start_col : int, optional
+        The column index (1-based) where extra columns should be inserted.
+        Must be at most one past the last DataFrame column. Defaults to 1.
+    """
+    extra_cols = extra_cols or {}
+    split = start_col - 1
+    formula_idxs = range(split, split + len(extra_cols))
+
+    headers = list(df.columns)
+    headers = headers[:split] + list(extra_cols) + headers[split:]
+    for col_idx, header in enumerate(headers, start=1):
+        cell = worksheet.cell(row=1, column=col_idx, value=header)
+        # formula headers are left unstyled, as add_extra_columns leaves them
+        if col_idx - 1 in formula_idxs:
+            continue
+        cell.font = HEADER_FONT
+        cell.border = THIN_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+
+    values = df.astype(object).where(df.notna(), None)
+    for idx, dtype in enumerate(df.dtypes):
+        if dtype != object:
+            continue
+        col = values.iloc[:, idx]
+        nested = col.map(is_list_like)
+        if nested.any():
+            values.iloc[:, idx] = col.where(~nested, col.astype(str))
+
+    formulas = [split_formula(formula) for formula in extra_cols.values()]
+    rows = values.itertuples(index=False, name=None)
+    for row_idx, row in enumerate(rows, start=2):
+        if formulas:
+            rendered = tuple(render_formula(parts, row_idx) for parts in formulas)
+            row = row[:split] + rendered + row[split:]
+        worksheet.append(row)
+
+
 def write_df_to_sheet(
     writer: pd.ExcelWriter,
     df: pd.DataFrame,
@@ -545,6 +757,7 @@ def write_df_to_sheet(
     start_col: int = 1,
     end_row: int | None = None,
     include_index: bool = False,
+    hyperlink_cols: tuple[str, str] = ("leftbreakpoint", "rightbreakpoint"),
 ) -> None:
     """Writes a Pandas DataFrame to an Excel sheet with formatting.
 
@@ -572,17 +785,50 @@ def write_df_to_sheet(
         Defaults to worksheet.max_row if not given.
     include_index : bool, optional
         Wether to write index of df to sheet. Defaults to False
-    """
-    df.to_excel(writer, sheet_name=sheet_name, index=include_index)
-    worksheet = writer.sheets[sheet_name]
-
-    set_tab_color(worksheet, tab_color)
+    hyperlink_cols : tuple[str, str], optional
+        Column names (case-insensitive) of breakpoints to write as VarSome
+        hyperlinks. Defaults to ("leftbreakpoint", "rightbreakpoint")
+    """
+    sheet_df = hyperlink_breakpoints(df, hyperlink_cols)
+    extra_cols_written = False
+
+    if include_index:
+        # to_excel handles merging of MultiIndex cells
+        sheet_df.to_excel(writer, sheet_name=sheet_name, index=include_index)
+        worksheet = writer.sheets[sheet_name]
+        set_tab_color(worksheet, tab_color)
+    else:
+        worksheet = create_blank_sheet(writer, sheet_name, tab_color)
+        # e.g. EPIC sheet, which only holds formula columns
+        if not df.columns.empty:
+            # formulas spanning just the data rows are written with them,
+            # skipping insert_cols shifting every written cell
+            if extra_cols and end_row is None and start_col <= len(df.columns) + 1:
+                append_df_rows(worksheet, sheet_df, extra_cols, start_col)
+                extra_cols_written = True
+            else:
+                append_df_rows(worksheet, sheet_df)
 
     # Add extra columns if provided
-    if extra_cols:
+    if extra_cols and not extra_cols_written:
         add_extra_columns(worksheet, extra_cols, start_col, end_row)
 
-    adjust_column_widths(worksheet)
+    if sheet_df is not df:
+        # colour just the hyperlinked columns rather than scanning the sheet
+        col_letters = [
+            get_col_letter(worksheet, col.strip())
+            for col in df.columns
+            if isinstance(col, str) and col.strip().lower() in hyperlink_cols
+        ]
+        colour_hyperlinks(worksheet, col_letters)
+
+    # widths follow the breakpoint text rather than the hyperlink formula
+    adjust_column_widths_from_df(
+        worksheet,
+        df.reset_index() if include_index else df,
+        extra_cols,
+        start_col,
+    )
     # Set column width for specific columns
     if col_widths:
         for col, width in col_widths.items():
@@ -600,10 +846,9 @@ def format_workbook(writer: pd.ExcelWriter) -> None:
 
     workbook = writer.book
 
-    add_breakpoint_hyperlinks(writer)
-
+    # single pass over the sheets, applying all formatting per sheet;
+    # breakpoint hyperlinks are already added and coloured by write_df_to_sheet
     for sheet in workbook.worksheets:
-        colour_hyperlinks(sheet)
         apply_header_format(sheet)
         format_columns_to_two_dp(sheet)
 
@@ -2,16 +2,55 @@
 pandas data frame
 """
 
+import os
 import re
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
 
-import dxpy
+import numpy as np
 import pandas as pd
 from dxpy import DXDataObject
 
 from .utils import create_pivot_table, read_dxfile
 
+# Accounts for accidental white space in sepators;
+# OK to capture some non-gene fusions here;
+# Only true fusions will be merged in summary sheet
+FUSION_PATTERN = re.compile(
+    r"""
+    \b
+    (?!NM_|NR_|ENST)
+    ([A-Z]{2,}[A-Za-z0-9_-]*)
+    \s*
+    (?: :: | -- | - )
+    \s*
+    (?!NM_|NR_|ENST)
+    ([A-Z]{2,}[A-Za-z0-9_-]*)
+    \b
+    """,
+    re.VERBOSE,
+)
+
+SF_PREVIOUS_CHUNKSIZE = 100_000
+
+# downloads are network bound, so threads mostly wait on IO. dxpy shares one
+# urllib3 pool of 32 connections per host, and threads beyond that force new
+# TLS handshakes, so default to 32; override with FUSION_DL_CONCURRENCY to
+# tune on a worker
+MAX_DOWNLOAD_WORKERS = int(os.environ.get("FUSION_DL_CONCURRENCY", 32))
+# STAR-Fusion, FusionInspector and Arriba are parsed at the same time, so the
+# limit is shared across calls rather than applied per pool
+_DOWNLOAD_SLOTS = threading.BoundedSemaphore(MAX_DOWNLOAD_WORKERS)
+
+# Column-wise equivalents of parse_specimen_id / parse_igv_specimen_name
+SPECIMEN_PATTERN = re.compile(r"^[^-]*-([^-]*)")
+# both names from one scan of the file name: Filename is the first three
+# '-' fields, SPECIMEN the second (NaN when there is no '-')
+FILE_NAME_PATTERN = re.compile(
+    r"^(?P<Filename>[^-]*(?:-(?P<SPECIMEN>[^-]*)(?:-[^-]*)?)?)"
+)
+
 
 def parse_specimen_id(sample: str) -> str:
     """parse SP ID from sample name
@@ -63,24 +102,11 @@ def extract_fusions(text: str) -> list:
         Unique standardised fusion pairs in GENE1--GENE2 format,
         or empty list if no valid fusions found
     """
-    if not text or pd.isna(text):
+    # also covers NaN / None from empty cells without calling pd.isna
+    if not isinstance(text, str) or not text:
         return []
 
-    # Accounts for accidental white space in sepators;
-    # OK to capture some non-gene fusions here;
-    # Only true fusions will be merged in summary sheet
-    pattern = r"""
-        \b
-        (?!NM_|NR_|ENST)
-        ([A-Z]{2,}[A-Za-z0-9_-]*)
-        \s*
-        (?: :: | -- | - )
-        \s*
-        (?!NM_|NR_|ENST)
-        ([A-Z]{2,}[A-Za-z0-9_-]*)
-        \b
-    """
-    matches = re.findall(pattern, text, re.VERBOSE)
+    matches = FUSION_PATTERN.findall(text)
 
     # Deduplicate and standardise format
     return list({f"{g1}--{g2}" for g1, g2 in matches if g1 and g2})
@@ -100,13 +126,15 @@ def parse_sf_previous(dxfile: DXDataObject) -> pd.DataFrame:
         pandas dataframe containing selected columns
     """
 
-    df = read_dxfile(dxfile, include_fname=False)
-    df = (
-        df[["#FusionName", "Count_predicted"]]
-        .drop_duplicates()
-        .sort_values(by="#FusionName")
-        .reset_index(drop=True)
+    # historical data grows every run; dedupe per chunk to bound memory
+    chunks = read_dxfile(
+        dxfile, include_fname=False, chunksize=SF_PREVIOUS_CHUNKSIZE
     )
+    df = pd.concat(
+        chunk[["#FusionName", "Count_predicted"]].drop_duplicates()
+        for chunk in chunks
+    )
+    df = df.drop_duplicates().sort_values(by="#FusionName", ignore_index=True)
 
     return df
 
@@ -139,21 +167,23 @@ def parse_fastqc(dxfile: DXDataObject) -> pd.DataFrame:
     if missing_cols:
         raise ValueError(f"Required columns missing from FastQC data: {missing_cols}")
 
-    df["Unique Reads"] = (
-        (df["total_deduplicated_percentage"] / 100.0) * df["Total Sequences"]
-    ).astype(int)
-    df["Duplicate Reads"] = (df["Total Sequences"] - df["Unique Reads"]).astype(int)
-    df["Unique Reads(M)"] = df["Unique Reads"] / 1_000_000
-    df["Duplicate Reads(M)"] = df["Duplicate Reads"] / 1_000_000
-    df = df[
-        [
-            "Sample",
-            "Unique Reads",
-            "Duplicate Reads",
-            "Unique Reads(M)",
-            "Duplicate Reads(M)",
-        ]
-    ]
+    # compute on the underlying arrays to avoid intermediate Series
+    total = df["Total Sequences"].to_numpy(dtype=np.float64)
+    dedup = df["total_deduplicated_percentage"].to_numpy(dtype=np.float64) / 100.0
+    unique = (dedup * total).astype(int)
+    duplicate = (total - unique).astype(int)
+
+    # build the output directly rather than widening the input frame
+    df = pd.DataFrame(
+        {
+            "Sample": df["Sample"],
+            "Unique Reads": unique,
+            "Duplicate Reads": duplicate,
+            "Unique Reads(M)": unique / 1_000_000,
+            "Duplicate Reads(M)": duplicate / 1_000_000,
+        },
+        index=df.index,
+    )
 
     return df
 
@@ -173,7 +203,7 @@ def make_fastqc_pivot(df: pd.DataFrame, pivot_config: dict) -> pd.DataFrame:
     pd.DataFrame
         created pivot table with computed columns
     """
-    df["SPECIMEN"] = df["Sample"].apply(parse_specimen_id)
+    df["SPECIMEN"] = df["Sample"].str.extract(SPECIMEN_PATTERN, expand=False)
 
     pivot_df = create_pivot_table(df, pivot_config)
     pivot_df = pivot_df.reset_index(drop=False)
@@ -181,6 +211,12 @@ def make_fastqc_pivot(df: pd.DataFrame, pivot_config: dict) -> pd.DataFrame:
     return pivot_df
 
 
+def _read_dxfile_limited(dxfile: DXDataObject) -> pd.DataFrame:
+    """read_dxfile, waiting for one of the shared download slots"""
+    with _DOWNLOAD_SLOTS:
+        return read_dxfile(dxfile)
+
+
 def _parse_fusion_files(dxfiles: List[DXDataObject]) -> pd.DataFrame:
     """
     Reads and concatenates a list of DNAnexus fusion-related files
@@ -200,21 +236,35 @@ def _parse_fusion_files(dxfiles: List[DXDataObject]) -> pd.DataFrame:
     if not dxfiles:
         return pd.DataFrame()
 
-    max_workers = min(16, len(dxfiles))
+    if len(dxfiles) == 1:
+        # nothing to overlap or concatenate; skip the pool and the concat copy
+        try:
+            return _read_dxfile_limited(dxfiles[0])
+        except Exception as e:
+            print(f"Error processing file: {e}")
+            return pd.DataFrame()
+
+    max_workers = min(MAX_DOWNLOAD_WORKERS, len(dxfiles))
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(read_dxfile, dxfile) for dxfile in dxfiles]
-        results = []
-        for future in futures:
+        futures = {
+            executor.submit(_read_dxfile_limited, dxfile): idx
+            for idx, dxfile in enumerate(dxfiles)
+        }
+        # harvest as files finish, keeping input order for the concat
+        results = [None] * len(dxfiles)
+        for future in as_completed(futures):
             try:
-                results.append(future.result())
+                results[futures[future]] = future.result()
             except Exception as e:
                 # Log the error and continue with other files
                 print(f"Error processing file: {e}")
 
+        results = [result for result in results if result is not None]
         if not results:
             return pd.DataFrame()
 
-        df = pd.concat(results)
+        # one concat over all files; per-file indexes would repeat 0..n
+        df = pd.concat(results, ignore_index=True)
 
     return df
 
@@ -239,10 +289,10 @@ def parse_fusion_inspector(dxfiles: List[DXDataObject]) -> pd.DataFrame:
         df["file_name"].str.split("_").str[0]
         + "_FusionInspector.fusions.abridged.merged.tsv"
     )
-    df = (
-        df.sort_values(by=["JunctionReadCount", "SpanningFragCount"])
-        .drop_duplicates()
-        .reset_index(drop=True)
+    # dedupe before sorting; the multi-key sort is stable, so the row
+    # order matches sorting first and deduplicating afterwards
+    df = df.drop_duplicates().sort_values(
+        by=["JunctionReadCount", "SpanningFragCount"], ignore_index=True
     )
     return df
 
@@ -299,7 +349,15 @@ def parse_prev_pos(dxfile: DXDataObject) -> pd.DataFrame:
     """
     df = read_dxfile(dxfile, sep=",", include_fname=False)
     df["Test Result"] = df["Test Result"].str.lstrip()
-    df["#FusionName"] = df["Test Result"].apply(extract_fusions)
+
+    # every fusion separator contains "-" or "::"; skip the regex otherwise
+    has_separator = df["Test Result"].str.contains(
+        "-", regex=False, na=False
+    ) | df["Test Result"].str.contains("::", regex=False, na=False)
+    df["#FusionName"] = [
+        extract_fusions(text) if candidate else []
+        for text, candidate in zip(df["Test Result"], has_separator)
+    ]
 
     return df
 
@@ -338,16 +396,18 @@ def make_sf_pivot(
         Created Pivot table with merged data
     """
 
-    df = sf_df.copy()
+    # shallow copy: new columns are added to df only and the merges below
+    # build fresh frames, so sf_df's data never needs duplicating
+    df = sf_df.copy(deep=False)
 
     if "file_name" in sf_df.columns:
-        df["SPECIMEN"] = df["file_name"].apply(parse_specimen_id)
+        names = df["file_name"].str.extract(FILE_NAME_PATTERN)
+        df["SPECIMEN"] = names["SPECIMEN"]
+        df["Filename"] = names["Filename"]
 
-        df["Filename"] = df["file_name"].apply(parse_igv_specimen_name)
+    df["ID"] = df["SPECIMEN"].str.cat(df["#FusionName"], sep="_")
 
-    df["ID"] = df["SPECIMEN"] + "_" + df["#FusionName"]
-
-    df["LEFTRIGHT"] = df["LeftBreakpoint"] + "_" + df["RightBreakpoint"]
+    df["LEFTRIGHT"] = df["LeftBreakpoint"].str.cat(df["RightBreakpoint"], sep="_")
 
     # Merge previous runs data (VLOOKUP equivalent)
     if not sf_runs_df.empty:
@@ -355,6 +415,7 @@ def make_sf_pivot(
             sf_runs_df[["#FusionName", "Count_predicted"]],
             on="#FusionName",
             how="left",
+            copy=False,
         )
         mask = df["#FusionName"].notna()
         df.loc[mask, "Count_predicted"] = (
@@ -363,14 +424,25 @@ def make_sf_pivot(
 
     # Merge FastQC metrics (VLOOKUP to FastQC_pivot)
     if not fastqc_pivot_df.empty:
-        df = df.merge(fastqc_pivot_df, on="SPECIMEN", how="left")
+        # one row per SPECIMEN, so join on the index instead of merging
+        df = df.join(
+            fastqc_pivot_df.set_index("SPECIMEN"), on="SPECIMEN", validate="m:1"
+        )
 
     # Merge Fusion Inspector data
     if not fi_df.empty:
-        fi_df["LEFTRIGHT"] = fi_df["LeftBreakpoint"] + "_" + fi_df["RightBreakpoint"]
-        df = df.merge(
-            fi_df[["LEFTRIGHT", "PROT_FUSION_TYPE"]], on="LEFTRIGHT", how="left"
-        ).rename(columns={"PROT_FUSION_TYPE": "FRAME"})
+        # reuse the key if the caller already has it; either way only a
+        # two-column lookup is built, leaving the caller's fi_df untouched
+        if "LEFTRIGHT" in fi_df.columns:
+            leftright = fi_df["LEFTRIGHT"]
+        else:
+            leftright = fi_df["LeftBreakpoint"].str.cat(
+                fi_df["RightBreakpoint"], sep="_"
+            )
+        fi_lookup = pd.DataFrame(
+            {"LEFTRIGHT": leftright, "FRAME": fi_df["PROT_FUSION_TYPE"]}
+        )
+        df = df.merge(fi_lookup, on="LEFTRIGHT", how="left", copy=False)
 
     # add prev positives
     prev_pos = (
@@ -379,24 +451,26 @@ def make_sf_pivot(
         .explode("#FusionName", ignore_index=True)
         .dropna(subset=["#FusionName"])
     )
+    # sort once up front so each group is already ordered for the join
     prev_pos_agg = (
-        prev_pos.groupby("#FusionName")["PreviousPositives"]
-        .apply(lambda x: ",".join(sorted(x)))
-        .reset_index()
+        prev_pos.sort_values(["#FusionName", "PreviousPositives"], kind="mergesort")
+        .groupby("#FusionName", sort=False)["PreviousPositives"]
+        .agg(",".join)
     )
-    df = df.merge(prev_pos_agg, on="#FusionName", how="left")
-    df["PreviousPositives"] = df["PreviousPositives"].fillna("")
+    df["PreviousPositives"] = df["#FusionName"].map(prev_pos_agg).fillna("")
 
     # add ref sources
     df = df.merge(
         ref_sources.rename(columns={"Fusion": "#FusionName"}),
         on="#FusionName",
         how="left",
+        copy=False,
     )
     df["ReferenceSources"] = df["ReferenceSources"].fillna("")
 
     # Create final pivot table
-    df = df.sort_values(by=["FFPM"], na_position="first").reset_index(drop=True)
+    # not redundant: the sort decides which row groupby().first() keeps
+    df = df.sort_values(by=["FFPM"], na_position="first", ignore_index=True)
     pivot_df = (
         df.groupby(pivot_config["index"], dropna=False)[pivot_config["values"]]
         .first()
@@ -3,7 +3,7 @@
 
 import openpyxl
 import pandas as pd
-from openpyxl.styles import PatternFill, Border, Side, Alignment
+from openpyxl.styles import Alignment
 from openpyxl.worksheet.worksheet import Worksheet
 
 from .excel import (
@@ -15,6 +15,8 @@ from .excel import (
     align_column_cells,
     add_drop_down_col,
     get_col_letter,
+    render_formula,
+    split_formula,
     write_df_to_sheet,
     drop_column,
     rotate_headers,
@@ -46,14 +48,22 @@ def add_databar_to_ffpm(
     # Get col letter for FFPM
     col_letter = get_col_letter(worksheet, ffpm_col)
 
-    for specimen, group in df.groupby(index_col):
+    # one grouped pass gives each specimen's row span and max FFPM;
+    # specimens sharing a max share one multi-range rule
+    keys = df[index_col]
+    rows = pd.Series(df.index, index=df.index).groupby(keys).agg(["first", "last"])
+    max_ffpms = df[ffpm_col].groupby(keys).max()
+
+    ranges_by_max = {}
+    for first, last, max_ffpm in zip(rows["first"], rows["last"], max_ffpms):
         # adjust for excel index (1-based, +1 for headers)
-        start = group.index[0] + 2
-        end = group.index[-1] + 2
+        start = first + 2
+        end = last + 2
 
         cell_range = f"{col_letter}{start}:{col_letter}{end}"
-        max_ffpm = group[ffpm_col].max()
+        ranges_by_max.setdefault(max_ffpm, []).append(cell_range)
 
+    for max_ffpm, cell_ranges in ranges_by_max.items():
         rule = openpyxl.formatting.rule.DataBarRule(
             start_type="num",
             start_value=0,
@@ -62,7 +72,7 @@ def add_databar_to_ffpm(
             color="FFC854",
             showValue=True,
         )
-        worksheet.conditional_formatting.add(cell_range, rule)
+        worksheet.conditional_formatting.add(" ".join(cell_ranges), rule)
 
     # adjust cells to display databar correctly
     set_column_width(worksheet, col_letter, 10.0)
@@ -95,6 +105,8 @@ def add_lookup_columns(
         r for r in worksheet.merged_cells.ranges if r.min_col == spec_col_idx
     ]
 
+    max_row = worksheet.max_row
+
     # Keep track of rows in merged ranges
     merged_rows = set()
     for r in merged_ranges:
@@ -106,6 +118,7 @@ def add_lookup_columns(
         new_col = openpyxl.utils.get_column_letter(new_col_idx)
 
         worksheet.cell(row=1, column=new_col_idx, value=header)
+        parts = split_formula(formula_template)
 
         # Apply formulas to merged cell groups
         for merged_range in merged_ranges:
@@ -117,19 +130,18 @@ def add_lookup_columns(
             worksheet.merge_cells(f"{new_col}{start}:{new_col}{end}")
 
             # Apply formula to first cell
-            formula = formula_template.replace("{row}", str(start))
+            formula = render_formula(parts, start)
             new_cell = worksheet.cell(row=start, column=new_col_idx, value=formula)
             new_cell.alignment = Alignment(vertical="top")
-
-            # Clear other merged cells (they inherit from first cell)
-            for row in range(start + 1, end + 1):
-                worksheet.cell(row=row, column=new_col_idx, value=None)
+            # the rest of the range is already empty MergedCells after
+            # merge_cells, so there is nothing to clear
 
         # Handle rows (not part of any merged range). Case of 1 fusion per sample
-        for row in range(2, worksheet.max_row + 1):
-            if row not in merged_rows:
-                formula = formula_template.replace("{row}", str(row))
-                cell = worksheet.cell(row=row, column=new_col_idx, value=formula)
+        for (cell,) in worksheet.iter_rows(
+            min_row=2, max_row=max_row, min_col=new_col_idx, max_col=new_col_idx
+        ):
+            if cell.row not in merged_rows:
+                cell.value = render_formula(parts, cell.row)
 
 
 def format_summary_sheet(
@@ -161,9 +173,11 @@ def format_summary_sheet(
     None
     """
 
-    df = source_df.copy()
-    if isinstance(df.index, pd.MultiIndex):
-        df.reset_index(inplace=True)
+    # the helpers below only read df, so reset_index's new frame is enough
+    if isinstance(source_df.index, pd.MultiIndex):
+        df = source_df.reset_index()
+    else:
+        df = source_df
 
     style_borders(worksheet)
     add_databar_to_ffpm(worksheet, df, ffpm_col, index_col)
@@ -198,8 +212,12 @@ def write_summary(
         "extra_cols",
         "drop_downs",
         "col_widths",
+        "col_colors",
     ]
     validate_config(config, expected_keys)
+    # check drop downs before any cells are written
+    for values in config["drop_downs"].values():
+        validate_config(values, ["options"])
 
     sheet_name = config["sheet_name"]
     tab_color = config["tab_color"]
@@ -3,18 +3,93 @@
 
 import re
 import os
+import tempfile
+from functools import lru_cache
+from typing import Iterator, Union
 from urllib.parse import quote
 
 import dxpy
 import pandas as pd
 from dxpy import DXDataObject
 
+DEFAULT_DX_CACHE_DIR = "/tmp/dxcache"
+
+VARSOME_BASE_URL = "https://varsome.com/position/hg38/"
+STRAND_SUFFIX_PATTERN = re.compile(r"[:][+\-]$")
+
+
+def download_dxfile(dxfile: DXDataObject) -> str:
+    """downloads a DNAnexus file object to a local cache directory
+
+    Closed DNAnexus files are immutable, so files are cached by file ID and
+    only downloaded on a cache miss. The cache directory can be set with
+    the DX_CACHE_DIR environment variable.
+
+    Parameters
+    ----------
+    dxfile : DXDataObject
+        An instance of DXDataObject to download
+
+    Returns
+    -------
+    str
+        Path to the local copy of the file
+    """
+    cache_dir = os.environ.get("DX_CACHE_DIR", DEFAULT_DX_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    path = os.path.join(cache_dir, dxfile.get_id())
+    if not os.path.exists(path):
+        # download to a temporary file so partial downloads are never cached
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+        os.close(fd)
+        try:
+            dxpy.download_dxfile(
+                dxfile.get_id(), tmp_path, project=dxfile.get_proj_id()
+            )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return path
+
+
+def _add_file_name(
+    df: pd.DataFrame, fname: str, add_dummy_row: bool = True
+) -> pd.DataFrame:
+    """sets file name as first column, optionally prepending a blank row"""
+    df.insert(0, "file_name", fname)
+
+    if add_dummy_row:
+        # add a blank row with file name;
+        # useful for samples with no fusion and for filtering excel
+        dummy_row = pd.DataFrame(
+            [[fname] + [pd.NA] * (df.shape[1] - 1)], columns=df.columns
+        )
+
+        df = pd.concat([dummy_row, df], ignore_index=True)
+
+    return df
+
+
+def _iter_dxfile_chunks(
+    dxfile: DXDataObject, path: str, sep: str, include_fname: bool, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """yields chunks of a downloaded file; see read_dxfile"""
+    chunks = pd.read_csv(path, sep=sep, engine="c", chunksize=chunksize)
+    for i, chunk in enumerate(chunks):
+        if include_fname:
+            chunk = _add_file_name(chunk, dxfile.name, add_dummy_row=i == 0)
+        yield chunk
+
 
 def read_dxfile(
     dxfile: DXDataObject,
     sep: str = "\t",
     include_fname: bool = True,
-) -> pd.DataFrame:
+    chunksize: int = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """reads a DNAnexus file object into a pandas dataframe
 
     Parameters
@@ -25,26 +100,26 @@ def read_dxfile(
         Delimeter of data values in files. Defaults to  "\t"
     include_fname : bool
         Specifies whether to set file name as first column. Defaults to True
+    chunksize : int, optional
+        Number of rows per chunk. If given, an iterator of DataFrames is
+        returned instead and the blank file name row is only added to the
+        first chunk
 
     Returns
     -------
-    pd.DataFrame
-        An instance of DataFrame with file content
+    pd.DataFrame | Iterator[pd.DataFrame]
+        An instance of DataFrame with file content, or an iterator of
+        DataFrame chunks if chunksize is given
     """
+    path = download_dxfile(dxfile)
 
-    df = pd.read_csv(dxfile, sep=sep)
+    if chunksize:
+        return _iter_dxfile_chunks(dxfile, path, sep, include_fname, chunksize)
 
-    if include_fname:
-        fname = dxfile.name
-        df.insert(0, "file_name", fname)
+    df = pd.read_csv(path, sep=sep, engine="c")
 
-        # add a blank row with file name;
-        # useful for samples with no fusion and for filtering excel
-        dummy_row = pd.DataFrame(
-            [[fname] + [pd.NA] * (df.shape[1] - 1)], columns=df.columns
-        )
-
-        df = pd.concat([dummy_row, df], ignore_index=True)
+    if include_fname:
+        df = _add_file_name(df, dxfile.name)
 
     return df
 
@@ -86,6 +161,12 @@ def create_pivot_table(
     return pivot_df
 
 
+@lru_cache(maxsize=None)
+def _describe_project_name(project_id: str) -> str:
+    """cached project name lookup; one API call per project per job"""
+    return dxpy.describe(project_id)["name"]
+
+
 def get_project_info() -> tuple[str, str]:
     """Get the project name for naming output file
 
@@ -93,38 +174,42 @@ def get_project_info() -> tuple[str, str]:
     -------
     tuple[str, str]
         Name and ID of DNAnexus project
+
+    Raises
+    ------
+    ValueError
+        if DX_PROJECT_CONTEXT_ID is not set
     """
 
     project_id = os.environ.get("DX_PROJECT_CONTEXT_ID")
+    if not project_id:
+        raise ValueError("DX_PROJECT_CONTEXT_ID is not set")
 
     # Get name of project for output naming
-    project_name = dxpy.describe(project_id)["name"]
+    project_name = _describe_project_name(project_id)
     project_name = project_name.split("_", 1)[1]
 
     return project_name, project_id
 
 
-def generate_varsome_url(breakpoint: str) -> str:
-    """Generate VarSome URL from breakpoint string.
+def generate_varsome_urls(breakpoints: pd.Series) -> pd.Series:
+    """Generate VarSome URLs for a column of breakpoint strings.
 
     Parameters
     ----------
-    breakpoint : str
-        Genomic coordinate in format "chr15:39594440:+" or "chr15:39594440:-"
+    breakpoints : pd.Series
+        Genomic coordinates in format "chr15:39594440:+" or "chr15:39594440:-"
 
     Returns
     -------
-    str
-        Enconded Varsome URL string
+    pd.Series
+        Encoded Varsome URL strings, same index as breakpoints
     """
+    encoded = breakpoints.str.replace(STRAND_SUFFIX_PATTERN, "", regex=True).map(
+        quote
+    )
 
-    base_url = "https://varsome.com/position/hg38/"
-
-    # remove ':' followed by '+' or '-' only at the end
-    bp = re.sub(r"[:][+\-]$", "", breakpoint)
-    encoded = quote(bp)
-
-    return f"{base_url}{encoded}"
+    return VARSOME_BASE_URL + encoded
 
 
 def validate_config(config: dict, expected_keys: list):
@@ -148,28 +233,89 @@ def validate_config(config: dict, expected_keys: list):
         raise ValueError(f"Missing required config key(s): {', '.join(missing_keys)}")
 
 
-def get_dxfile(files: list[dxpy.DXDataObject], target_name: str) -> dxpy.DXDataObject:
-    """Finds a DXDataObject in the given list that matches the specified filename.
+@lru_cache(maxsize=None)
+def _dxfile(dxid: str, project: str = None) -> dxpy.DXFile:
+    """cached DXFile factory so repeated IDs share one handler"""
+    return dxpy.DXFile(dxid, project=project)
+
+
+def to_dxfile(link) -> dxpy.DXFile:
+    """initialises a DXFile from a DXLink, reusing handlers by file ID
+
+    Parameters
+    ----------
+    link : dict | str
+        DXLink (eg {"$dnanexus_link": "file-xxxx"} or with an explicit
+        project) or a bare file ID
+
+    Returns
+    -------
+    dxpy.DXFile
+        DXFile handler for the linked file
+    """
+    if isinstance(link, dict):
+        link = link["$dnanexus_link"]
+
+    if isinstance(link, dict):
+        return _dxfile(link["id"], link.get("project"))
+
+    return _dxfile(link)
+
+
+def index_dxfiles(files: list[dxpy.DXDataObject]) -> dict:
+    """Indexes DXDataObjects by file name.
 
     Parameters
     ----------
     files : list[dxpy.DXDataObject]
         List of DNAnexus data objects (e.g., DXFile instances)
+
+    Returns
+    -------
+    dict
+        Mapping of file name to DXDataObject
+
+    Raises
+    ------
+    ValueError
+        If two different files share the same name.
+    """
+    index = {}
+    for f in files:
+        if index.setdefault(f.name, f) is not f:
+            raise ValueError(f"Multiple files named {f.name} in input array")
+
+    return index
+
+
+def get_dxfile(
+    files: Union[list[dxpy.DXDataObject], dict], target_name: str
+) -> dxpy.DXDataObject:
+    """Finds a DXDataObject in the given files that matches the specified filename.
+
+    Parameters
+    ----------
+    files : list[dxpy.DXDataObject] | dict
+        List of DNAnexus data objects (e.g., DXFile instances), or a name
+        index built with index_dxfiles to reuse across lookups
     target_name : str
         The exact file name to search for (case-sensitive match).
 
     Returns
     -------
     dxpy.DXDataObject
-        The first DXDataObject with a .name attribute matching `target_name`.
+        The DXDataObject with a .name attribute matching `target_name`.
 
     Raises
     ------
     ValueError
-        If no file with the specified name is found in the list.
+        If no file with the specified name is found in the list, or if a
+        list is given and two different files in it share a name.
     """
+    if not isinstance(files, dict):
+        files = index_dxfiles(files)
 
     try:
-        return next(f for f in files if f.name == target_name)
-    except StopIteration:
+        return files[target_name]
+    except KeyError:
         raise ValueError(f"{target_name} not found in input array")
@@ -17,6 +17,10 @@ import tarfile
 import dxpy
 import pandas as pd
 
+# sources are streamed in chunks so memory scales with unique fusions
+# rather than with the size of the source files
+CHUNKSIZE = 100_000
+
 
 def parse_arguments() -> argparse.Namespace:
     """
@@ -70,15 +74,33 @@ def read_cosmic(tar_path: str) -> pd.DataFrame:
         except KeyError:
             raise ValueError(f"Expected {fname} not in COSMIC tar")
 
-        df = pd.read_csv(f, sep="\t", compression="gzip")
-        missing_cols = [col for col in req_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+        # only the gene symbols are used; skip parsing the other columns.
+        # a callable keeps missing columns reported by the check below
+        reader = pd.read_csv(
+            f,
+            sep="\t",
+            compression="gzip",
+            usecols=lambda col: col in req_cols,
+            engine="c",
+            chunksize=CHUNKSIZE,
+        )
+
+        fusions = set()
+        with reader:
+            for df in reader:
+                missing_cols = [col for col in req_cols if col not in df.columns]
+                if missing_cols:
+                    raise ValueError(f"Missing required columns: {missing_cols}")
+
+                fusions.update(
+                    (
+                        df.FIVE_PRIME_GENE_SYMBOL + "--" + df.THREE_PRIME_GENE_SYMBOL
+                    ).dropna()
+                )
 
-        fusions = df.FIVE_PRIME_GENE_SYMBOL + "--" + df.THREE_PRIME_GENE_SYMBOL
-        print(f"COSMIC: {len(set(fusions))} unique fusions")
+        print(f"COSMIC: {len(fusions)} unique fusions")
 
-        return pd.DataFrame({"Fusion": fusions, "ReferenceSources": "COSMIC"})
+        return pd.DataFrame({"Fusion": sorted(fusions), "ReferenceSources": "COSMIC"})
 
 
 def read_chimerkb4(file_path: str) -> pd.DataFrame:
@@ -96,14 +118,16 @@ def read_chimerkb4(file_path: str) -> pd.DataFrame:
         DataFrame with columns ['Fusion', 'ReferenceSources'].
     """
 
-    df = pd.read_excel(file_path)
+    # only Fusion_pair is used; a callable leaves a missing column to the
+    # check below rather than failing inside read_excel
+    df = pd.read_excel(file_path, usecols=lambda col: col == "Fusion_pair")
 
     # Replace '-' with '--' in fusion column
     if "Fusion_pair" not in df.columns:
         raise ValueError(f"Missing 'Fusion_pair' col in ChimerKB4 data")
 
     fusions = df["Fusion_pair"].str.replace("-", "--")
-    print(f"ChimerKB4: {len(set(fusions))} unique fusions")
+    print(f"ChimerKB4: {fusions.nunique()} unique fusions")
 
     return pd.DataFrame({"Fusion": fusions, "ReferenceSources": "ChimerKB4"})
 
@@ -122,16 +146,21 @@ def read_fusiongdb2(file_path: str) -> pd.DataFrame:
     pd.DataFrame
         DataFrame with columns ['Fusion', 'ReferenceSources'].
     """
-    df = pd.read_csv(file_path, sep="\t", header=None)
+    fusions = set()
+    # fusion names as str even if a chunk's column 1 happens to be all empty
+    with pd.read_csv(
+        file_path, sep="\t", header=None, dtype={1: str}, chunksize=CHUNKSIZE
+    ) as reader:
+        for df in reader:
+            # Extract the second column (fusion names)
+            if len(df.columns) < 2:
+                raise ValueError("FusionGDB2 file must have at least 2 columns")
 
-    # Extract the second column (fusion names)
-    if len(df.columns) < 2:
-        raise ValueError("FusionGDB2 file must have at least 2 columns")
+            fusions.update(df[1].str.replace("-", "--").dropna())
 
-    fusions = df[1].str.replace("-", "--")
-    print(f"FusionGDB2: {len(set(fusions))} unique fusions")
+    print(f"FusionGDB2: {len(fusions)} unique fusions")
 
-    return pd.DataFrame({"Fusion": fusions, "ReferenceSources": "FusionGDB2"})
+    return pd.DataFrame({"Fusion": sorted(fusions), "ReferenceSources": "FusionGDB2"})
 
 
 def generate_ref_source(cosmic: str, fusiongdb2: str, chimerkb4: str) -> str:
@@ -159,9 +188,12 @@ def generate_ref_source(cosmic: str, fusiongdb2: str, chimerkb4: str) -> str:
     )
 
     # Group by Fusion and aggregate sources
+    # dedupe and sort up front so each group is already unique and ordered
     fusion_sources = (
-        df.groupby("Fusion")["ReferenceSources"]
-        .apply(lambda x: ",".join(sorted(set(x))))
+        df.drop_duplicates()
+        .sort_values(["Fusion", "ReferenceSources"])
+        .groupby("Fusion", sort=False)["ReferenceSources"]
+        .agg(",".join)
         .reset_index()
     )
     outfile = "ReferenceSources.tsv"
@@ -6,13 +6,34 @@ been called in all PANCAN runs
 
 import argparse
 import os
+import re
 import sys
+import tempfile
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import dxpy
+import numpy as np
 import pandas as pd
 
+# control samples and RNA runs, matched against file names
+CONTROL_PATTERN = re.compile(r"^\d+-\d+Q\d+-|RNA")
+
+# results requested in the first find_data_objects page
+FIND_PAGE_SIZE = 1000
+
+# max file ids sent per project_unarchive request
+UNARCHIVE_BATCH_SIZE = 1000
+
+# local copies of STAR-Fusion files, keyed by file ID; kept in the user cache
+# directory rather than the working directory / repo checkout
+SF_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "eggd_generate_fusion_workbook",
+    "sf_files",
+)
+SHM_DIR = "/dev/shm"
+
 
 def parse_arguments():
     """
@@ -24,6 +45,17 @@ def parse_arguments():
     parser.add_argument(
         "--project_id", required=True, help="DNAnexus project ID to upload the file to."
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"re-download all files instead of reusing copies in {SF_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--save-intermediate",
+        choices=["none", "csv"],
+        default="none",
+        help="format to save the concatenated raw STAR-Fusion data in",
+    )
 
     return parser.parse_args()
 
@@ -61,35 +93,52 @@ def find_sf_files(project_id: str) -> pd.DataFrame:
     pd.DataFrame
         pandas dataframe containing file names, file ids and archival state
     """
-    res = list(
-        dxpy.find_data_objects(
+    # build records straight from the paged generator; `limit` would cap the
+    # total number of results, so request a larger first page instead
+    res = [
+        {
+            "project_id": x["project"],
+            "file_id": x["id"],
+            "name": x["describe"]["name"],
+            "archival_state": x["describe"]["archivalState"],
+        }
+        for x in dxpy.find_data_objects(
             project=project_id,
             folder="/output/",
             recurse=True,
-            name="star-fusion.fusion_predictions.abridged.tsv$",
+            name="*star-fusion.fusion_predictions.abridged.tsv",
             classname="file",
-            name_mode="regexp",
+            name_mode="glob",
             describe={"fields": {"name": True, "archivalState": True}},
+            first_page_size=FIND_PAGE_SIZE,
         )
-    )
+    ]
     if not res:
         print(f"match not found in {project_id}")
         return pd.DataFrame()
 
     print(f"found {len(res)} matches in {project_id}")
-    res = [
-        {
-            "project_id": x["project"],
-            "file_id": x["id"],
-            "name": x["describe"]["name"],
-            "archival_state": x["describe"]["archivalState"],
-        }
-        for x in res
-    ]
-
     return pd.DataFrame(res)
 
 
+def batched(items: list, size: int) -> list:
+    """splits a list into consecutive batches of at most `size` items
+
+    Parameters
+    ----------
+    items : list
+        items to split
+    size : int
+        maximum number of items per batch
+
+    Returns
+    -------
+    list[list]
+        list of batches, in input order
+    """
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
 def check_archival_state(df: pd.DataFrame) -> None:
     """check archival state and unarchive if any
 
@@ -98,55 +147,101 @@ def check_archival_state(df: pd.DataFrame) -> None:
     df : pd.Dataframe
         Pandas df containing DNAnexus project ids and file ids
     """
-    # Subset df to unarchived
-    df_archived = df[df["archival_state"].isin(["archived", "archival"])]
+    state = df["archival_state"]
+    is_archived = state.isin(["archived", "archival"])
+    n_archived = is_archived.sum()
+
+    if n_archived:
+        print(f"{n_archived}/{len(df)} files found are archived")
 
-    if not df_archived.empty:
-        print(f"{len(df_archived)}/{len(df)} files found are archived")
+        # only the ids are needed to request unarchival
+        df_archived = df.loc[is_archived, ["project_id", "file_id"]]
 
         # Group by 'project_id' to send unarchive request per project
         grouped = df_archived.groupby("project_id")["file_id"]
 
-        for project_id, file_ids in grouped:
+        # chunk large projects to keep each request body bounded
+        requests = [
+            (project_id, batch)
+            for project_id, file_ids in grouped
+            for batch in batched(list(file_ids), UNARCHIVE_BATCH_SIZE)
+        ]
 
-            response = dxpy.api.project_unarchive(project_id, {"files": list(file_ids)})
-            print(response)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for response in executor.map(
+                lambda x: dxpy.api.project_unarchive(x[0], {"files": x[1]}), requests
+            ):
+                print(response)
 
-        print(f"\nUnarchive Request sent for {len(df_archived)} files")
+        print(f"\nUnarchive Request sent for {n_archived} files")
         print("Please rerun script after a few hours. Exiting!...")
         sys.exit()
 
     # check for files still unarchiving
-    df_unarchiving = df[df.archival_state == "unarchiving"]
-    if not df_unarchiving.empty:
-        print(f"{len(df_unarchiving)} files are still unarchiving")
+    n_unarchiving = (state == "unarchiving").sum()
+    if n_unarchiving:
+        print(f"{n_unarchiving} files are still unarchiving")
         print("Please rerun script after a few hours. Exiting!...")
         sys.exit()
 
 
-def read_sf_file(file_id: str, project: str) -> pd.DataFrame:
+def read_sf_file(
+    file_id: str, project: str, cache_dir: str = None, usecols: list = None
+) -> pd.DataFrame:
     """reads the content of DNAnexus file to a pandas df
 
+    Closed DNAnexus files are immutable, so if a cache directory is given the
+    file is downloaded there once and reused on reruns.
+
     Parameters
     ----------
     file_id : str
         DNAnexus file ID
     project : str
         DNAnexus project containing file
+    cache_dir : str, optional
+        directory of local copies keyed by file ID. Defaults to None, where
+        the file is downloaded to a temporary file and removed once read
+    usecols : list, optional
+        columns to parse. Defaults to None (all columns)
 
     Returns
     -------
     pd.DataFrame
         pandas dataframe containing file content
     """
-    with dxpy.open_dxfile(file_id, project) as dx_file:
-        df = pd.read_csv(dx_file, sep="\t")
-        df.insert(0, "file_name", dx_file.name)
+    if cache_dir is None:
+        # download whole file with dxpy's chunked downloader, then parse
+        # locally; tmpfs keeps the round trip off disk where available
+        tmp_dir = SHM_DIR if os.path.isdir(SHM_DIR) else None
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".tsv")
+        os.close(fd)
+        try:
+            dxpy.download_dxfile(file_id, tmp_path, project=project)
+            df = pd.read_csv(tmp_path, sep="\t", usecols=usecols)
+        finally:
+            os.unlink(tmp_path)
+    else:
+        path = os.path.join(cache_dir, f"{file_id}.tsv")
+        if not os.path.exists(path):
+            # download to a temporary file so partial downloads are never cached
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+            os.close(fd)
+            try:
+                dxpy.download_dxfile(file_id, tmp_path, project=project)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        df = pd.read_csv(path, sep="\t", usecols=usecols)
 
     return df
 
 
-def parse_fusion_files(df: pd.DataFrame) -> pd.DataFrame:
+def parse_fusion_files(
+    df: pd.DataFrame, cache_dir: str = None, save_raw_data: bool = False
+) -> pd.DataFrame:
     """
     Reads and concatenates a list of DNAnexus fusion-related files
     into a single DataFrame.
@@ -155,29 +250,52 @@ def parse_fusion_files(df: pd.DataFrame) -> pd.DataFrame:
     ----------
     df : pd.DataFrame
         A pandas dataframe containing files to parse.
+    cache_dir : str, optional
+        directory to cache downloaded files in. Defaults to None (no cache)
+    save_raw_data : bool
+        save the concatenated data to csv for reference. Defaults to False
 
     Returns
     -------
     pd.DataFrame
         A concatenated DataFrame containing the combined data
-        from all input files.
+        from all input files; only file_name and #FusionName are kept
+        unless save_raw_data is set
     """
     # all files should be live at this point
     df = df[(df.archival_state == "live")]
 
     files = list(df.file_id)
     projects = list(df.project_id)
+    # file names are stored once per file as categories, not once per row
+    name_codes, names = pd.factorize(df.name)
     args = zip(files, projects)
 
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # counting only needs fusion names; keep every column for the raw dump
+    usecols = None if save_raw_data else ["#FusionName"]
+
     n_workers = min(32, os.cpu_count() * 6)
     with ThreadPoolExecutor(max_workers=n_workers) as executor:
-        df = pd.concat(
-            list(executor.map(lambda x: read_sf_file(*x), args)), ignore_index=True
+        dfs = list(
+            executor.map(lambda x: read_sf_file(*x, cache_dir, usecols), args)
         )
-    # save intermediate file for reference
-    date_str = datetime.now().strftime("%y%m%d")
-    file_name = f"sf_previous_runs_raw_data_{date_str}.csv"
-    df.to_csv(file_name, index=False)
+
+    lengths = [len(x) for x in dfs]
+    df = pd.concat(dfs, ignore_index=True)
+    df.insert(
+        0,
+        "file_name",
+        pd.Categorical.from_codes(np.repeat(name_codes, lengths), categories=names),
+    )
+    if save_raw_data:
+        # save intermediate file for reference
+        date_str = datetime.now().strftime("%y%m%d")
+        file_name = f"sf_previous_runs_raw_data_{date_str}.csv"
+        df.to_csv(file_name, index=False)
+
     return df
 
 
@@ -209,10 +327,19 @@ def upload_static_file(data: pd.DataFrame, project_id: str) -> None:
         sys.exit(1)
 
 
-def generate_static_file() -> pd.DataFrame:
+def generate_static_file(
+    use_cache: bool = True, save_raw_data: bool = False
+) -> pd.DataFrame:
     """
     Generates SF static input from all eunomia runs
 
+    Parameters
+    ----------
+    use_cache : bool
+        reuse local copies of previously downloaded files. Defaults to True
+    save_raw_data : bool
+        save the concatenated raw data to csv. Defaults to False
+
     Returns
     -------
     pd.DataFrame
@@ -222,26 +349,39 @@ def generate_static_file() -> pd.DataFrame:
     project_ids = get_project_ids()
     print(f"Total PCAN Projects: {len(project_ids)}")
 
-    df = pd.concat([find_sf_files(proj) for proj in project_ids], ignore_index=True)
+    # searches are independent API round trips; overlap them across projects
+    n_workers = min(32, os.cpu_count() * 6)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        found = [
+            res for res in executor.map(find_sf_files, project_ids) if not res.empty
+        ]
+    df = pd.concat(found, ignore_index=True) if found else pd.DataFrame()
 
     check_archival_state(df)
-    df = parse_fusion_files(df)
+    df = parse_fusion_files(
+        df,
+        cache_dir=SF_CACHE_DIR if use_cache else None,
+        save_raw_data=save_raw_data,
+    )
 
-    # drop controls
-    pattern = r"^\d+-\d+Q\d+-|RNA"
-    df = df[~df["file_name"].str.contains(pattern)]
+    # drop controls; names repeat per row, so match each file name once
+    controls = {
+        name for name in df["file_name"].unique() if CONTROL_PATTERN.search(name)
+    }
+    df = df[~df["file_name"].isin(controls)]
 
     # Count each unique fusion
     df_counts = df["#FusionName"].value_counts().reset_index()
     df_counts.columns = ["#FusionName", "Count_predicted"]
 
-    # Add a special row for the number of samples used to generate this file
-    # This is same as n unique file names;
-    n_samples = df["file_name"].nunique()
-    df_counts.loc[len(df_counts.index)] = ["#Samples", n_samples]
+    # Sort alphabetically by Fusion
+    df_counts = df_counts.sort_values(by="#FusionName")
 
-    # Sort alphabetically by Fusion, this ensure # comes first
-    df_counts = df_counts.sort_values(by="#FusionName").reset_index(drop=True)
+    # Add a special first row for the number of samples used to generate this
+    # file; this is same as n unique file names
+    n_samples = df["file_name"].nunique()
+    samples_row = pd.DataFrame([["#Samples", n_samples]], columns=df_counts.columns)
+    df_counts = pd.concat([samples_row, df_counts], ignore_index=True)
 
     return df_counts
 
@@ -250,7 +390,10 @@ def main():
     """Entry point to script"""
     args = parse_arguments()
 
-    static_data = generate_static_file()
+    static_data = generate_static_file(
+        use_cache=not args.no_cache,
+        save_raw_data=args.save_intermediate == "csv",
+    )
 
     upload_static_file(static_data, args.project_id)
 